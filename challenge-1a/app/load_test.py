@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _open_connection(host, port, unix_socket):
+    if unix_socket:
+        return await asyncio.open_unix_connection(unix_socket)
+    return await asyncio.open_connection(host, port)
+
+
+async def _request(reader, writer, method, path, body=b"", headers=None):
+    """Sends one HTTP/1.1 request on a keep-alive connection and returns (status, payload)."""
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+    for name, value in (headers or {}).items():
+        head += f"{name}: {value}\r\n"
+    writer.write(head.encode("latin-1") + b"\r\n" + body)
+    await writer.drain()
+
+    response_head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(response_head[0].split(" ", 2)[1])
+    response_headers = {}
+    for line in response_head[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            response_headers[name.strip().lower()] = value.strip()
+    payload = await reader.readexactly(int(response_headers.get("content-length", 0)))
+    return status, json.loads(payload) if payload else {}
+
+
+async def _client(pdfs, args, deadline, latencies, statuses, paths):
+    reader, writer = await _open_connection(args.host, args.port, args.unix_socket)
+    try:
+        while time.perf_counter() < deadline:
+            filename, data = random.choice(pdfs)
+            start = time.perf_counter()
+            status, payload = await _request(reader, writer, "POST", f"/outline?timeout={args.timeout}", data,
+                                             {"X-Filename": filename, "Content-Type": "application/pdf"})
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+                paths[payload.get("path", {}).get("outline", "unknown")] += 1
+            elif status == 503:
+                # Honour the server's backpressure instead of hammering it
+                await asyncio.sleep(args.backoff)
+    finally:
+        writer.close()
+
+
+async def run_load_test(args):
+    pdfs = []
+    for name in sorted(os.listdir(args.input_dir)):
+        if name.lower().endswith(".pdf"):
+            with open(os.path.join(args.input_dir, name), "rb") as f:
+                pdfs.append((name, f.read()))
+    if not pdfs:
+        print(f"No PDF files found in {args.input_dir}.")
+        return
+
+    latencies, statuses, paths = [], Counter(), Counter()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(_client(pdfs, args, deadline, latencies, statuses, paths)
+                           for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await _open_connection(args.host, args.port, args.unix_socket)
+    _, metrics = await _request(reader, writer, "GET", "/metrics")
+    writer.close()
+
+    latencies.sort()
+    print(f"\nSent {sum(statuses.values())} requests over {elapsed:.1f}s with concurrency {args.concurrency}")
+    print(f"Sustained throughput: {len(latencies) / elapsed:.1f} outlines/s")
+    print(f"Status codes: {dict(statuses)}")
+    print(f"Outline paths: {dict(paths)}")
+    print("Latency (s): " + ", ".join(f"p{p}={percentile(latencies, p):.3f}" for p in (50, 90, 99))
+          + f", max={latencies[-1] if latencies else 0:.3f}")
+    print("Server metrics: " + json.dumps(metrics, indent=2))
+
+
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    import argparse
+
+    SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+    PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+    parser = argparse.ArgumentParser(description="Load test for the PDF Outline Extraction Service")
+    parser.add_argument('--host', type=str, default="127.0.0.1", help='Service host')
+    parser.add_argument('--port', type=int, default=8080, help='Service TCP port')
+    parser.add_argument('--unix-socket', type=str, default=None, help='Connect to this Unix socket instead of TCP')
+    parser.add_argument('--input-dir', type=str, default=os.path.join(PROJECT_ROOT, "input"),
+                        help='Directory of PDFs to send')
+    parser.add_argument('--concurrency', type=int, default=8, help='Number of concurrent connections')
+    parser.add_argument('--duration', type=float, default=30.0, help='Test duration in seconds')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout passed to the service')
+    parser.add_argument('--backoff', type=float, default=0.05, help='Seconds to wait after a 503 before retrying')
+    args = parser.parse_args()
+
+    asyncio.run(run_load_test(args))
@@ -6,6 +6,9 @@ from pdf_utils import (
     get_document_body_style,
     get_header_footer_zones,
     extract_title_from_content,
+    extract_title_from_first_page,
+    extract_title_from_metadata,
+    validate_toc_outline,
     extract_outline_from_toc,
     extract_outline_with_heuristics,
     classify_and_sort_headings
@@ -60,58 +63,131 @@ def classify_and_sort_headings(headings):
     classified_headings.sort(key=lambda x: (x['page'], x['level']))
     return classified_headings
 
-def extract_universal_outline(pdf_path):
-    """Main function to extract an outline, returning an empty title if none is found."""
-    doc = fitz.open(pdf_path)
-    if not doc.page_count:
-        return {"title": "", "outline": []}
-
+def extract_title(doc, pdf_path):
+    """
+    Eager title extraction: largest text on the whole first page, then content, then filename.
+    Returns a (title, source) tuple.
+    """
     # Start with an empty title as the default
     title = ""
     # --- Title Extraction ---
     # Look for the largest text on the first page for the title.
     # Combine adjacent lines if they have similar large font sizes.
     try:
-        first_page = doc[0]
-        blocks = first_page.get_text("dict", sort=True)["blocks"]
-        
-        font_sizes = [s['size'] for b in blocks if 'lines' in b for l in b['lines'] for s in l['spans']]
-        if not font_sizes:
-            raise Exception("No text found on first page")
-            
-        largest_size = max(font_sizes)
-        # Consider fonts within 95% of the largest size as part of the title
-        title_texts = [
-            s['text'].strip() 
-            for b in blocks if 'lines' in b 
-            for l in b['lines'] 
-            for s in l['spans'] 
-            if abs(s['size'] - largest_size) < largest_size * 0.05
-        ]
-        title = " ".join(dict.fromkeys(title_texts)) # Use dict.fromkeys to remove duplicates
+        title = extract_title_from_first_page(doc)
+        source = "first-page"
     except Exception as e:
         print(f"Could not determine title automatically: {e}")
         title = os.path.basename(pdf_path)
+        source = "filename"
 
-    
-    # 2. If metadata fails, try extracting from content
+    # 2. If that fails, try extracting from content
     if not title:
-        content_title = extract_title_from_content(doc)
-        if content_title and len(content_title) >= 4:
-            title = content_title
-    
-    # --- Outline extraction remains the same ---
-    # 'title' will be an empty string if both methods above failed.
-    outline = extract_outline_from_toc(doc)
-    if not outline:
-        logging.warning(f"No valid TOC found in '{os.path.basename(pdf_path)}'. Falling back to heuristics.")
-        outline = extract_outline_with_heuristics(doc)
+        return _title_from_content(doc)
+    return title, source
+
+
+def extract_title_lazily(doc, pdf_path):
+    """
+    Lazy title extraction: metadata first, then only the top of the first page.
+    If the top of the page has no title text, the eager chain (extract_title) is
+    used, so documents without a metadata title get the same title either way.
+    Returns a (title, source) tuple.
+    """
+    title = extract_title_from_metadata(doc)
+    if title:
+        return title, "metadata"
+    first_page = doc[0]
+    top_region = fitz.Rect(first_page.rect.x0, first_page.rect.y0,
+                           first_page.rect.x1, first_page.rect.y0 + first_page.rect.height * 0.6)
+    try:
+        title = extract_title_from_first_page(doc, clip=top_region)
+    except Exception:
+        title = ""
+    if not title:
+        return extract_title(doc, pdf_path)
+    return title, "first-page"
+
+
+def _title_from_content(doc):
+    content_title = extract_title_from_content(doc)
+    if content_title and len(content_title) >= 4:
+        return content_title, "content"
+    return "", "none"
+
+
+def extract_outline_and_path(pdf_path, lazy=True, pdf_bytes=None, validate_toc=False):
+    """
+    Extracts the title and outline, also reporting which path was taken.
 
-    return {"title": title, "outline": outline}
+    The embedded TOC is always tried first. With lazy=True, a document whose
+    TOC is used takes its title from the metadata or the top of the first
+    page, so only that region is decoded. Documents without a usable TOC go
+    through the full heuristics and the eager title extraction, exactly as
+    with lazy=False, so lazy and eager only differ in the title of bookmarked
+    PDFs.
+
+    With validate_toc=True the TOC entries are also checked against the text of
+    the pages they reference, and a TOC that fails the check is replaced by the
+    heuristic outline. This is opt-in because scanned PDFs and bookmarks whose
+    labels differ from the printed headings fail it.
+
+    If pdf_bytes is given the document is opened from memory and pdf_path is
+    only used as its name.
+
+    Returns a ({"title", "outline"}, path) tuple, where path is a dict with
+    'title' and 'outline' keys naming the source each came from.
+    """
+    source = fitz.open(stream=pdf_bytes, filetype="pdf") if pdf_bytes is not None else fitz.open(pdf_path)
+    with source as doc:
+        if not doc.page_count:
+            return {"title": "", "outline": []}, {"title": "empty", "outline": "empty"}
+
+        outline = extract_outline_from_toc(doc)
+        if outline and validate_toc and not validate_toc_outline(doc, outline):
+            logging.warning(f"TOC entries in '{os.path.basename(pdf_path)}' do not match page text.")
+            outline = None
+
+        if outline:
+            outline_path = "toc"
+            title, title_path = extract_title_lazily(doc, pdf_path) if lazy else extract_title(doc, pdf_path)
+        else:
+            logging.warning(f"No valid TOC found in '{os.path.basename(pdf_path)}'. Falling back to heuristics.")
+            outline = extract_outline_with_heuristics(doc)
+            outline_path = "heuristics"
+            title, title_path = extract_title(doc, pdf_path)
+
+    return {"title": title, "outline": outline}, {"title": title_path, "outline": outline_path}
+
+
+def extract_universal_outline(pdf_path, lazy=True, pdf_bytes=None):
+    """Main function to extract an outline, returning an empty title if none is found."""
+    result, _ = extract_outline_and_path(pdf_path, lazy=lazy, pdf_bytes=pdf_bytes)
+    return result
+
+
+def check_title_paths(pdf_paths):
+    """
+    Compares the lazy and eager titles of every PDF without a metadata title,
+    where the two are expected to agree. Returns a list of
+    (pdf_path, lazy_title, eager_title) tuples for the PDFs where they differ.
+    """
+    mismatches = []
+    for pdf_path in pdf_paths:
+        with fitz.open(pdf_path) as doc:
+            if not doc.page_count or extract_title_from_metadata(doc):
+                continue
+            lazy_title, _ = extract_title_lazily(doc, pdf_path)
+            eager_title, _ = extract_title(doc, pdf_path)
+        if lazy_title != eager_title:
+            mismatches.append((pdf_path, lazy_title, eager_title))
+    return mismatches
 
 # --- Main Execution Block ---
 if __name__ == "__main__":
     import argparse
+    import time
+    from collections import Counter
     from tqdm import tqdm
 
     # Set up logging
@@ -128,6 +204,11 @@ if __name__ == "__main__":
     parser.add_argument('--input-dir', type=str, default=None, help='Input directory with PDF files')
     parser.add_argument('--output-dir', type=str, default=None, help='Output directory for JSON files')
     parser.add_argument('--sample-pages', type=int, default=3, help='Number of sample pages for header/footer detection')
+    parser.add_argument('--eager', action='store_true', help='Always decode the whole first page for the title')
+    parser.add_argument('--validate-toc', action='store_true',
+                        help='Fall back to heuristics when TOC entries do not match their page text')
+    parser.add_argument('--check-titles', action='store_true',
+                        help='Only check that lazy and eager titles agree on PDFs without a metadata title')
     args = parser.parse_args()
 
     SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -150,14 +231,33 @@ if __name__ == "__main__":
     if not pdf_files:
         logging.warning(f"No PDF files found in {INPUT_DIR}. Exiting.")
 
+    if args.check_titles:
+        mismatches = check_title_paths([os.path.join(INPUT_DIR, f) for f in sorted(pdf_files)])
+        for pdf_path, lazy_title, eager_title in mismatches:
+            logging.error(f"❌ Title mismatch in '{os.path.basename(pdf_path)}': lazy={lazy_title!r} eager={eager_title!r}")
+        logging.info(f"Title check: {len(mismatches)} mismatches in {len(pdf_files)} PDFs.")
+        raise SystemExit(1 if mismatches else 0)
+
+    path_counts = Counter()
+    start_time = time.perf_counter()
     for filename in tqdm(pdf_files, desc="Processing PDFs"):
         pdf_path = os.path.join(INPUT_DIR, filename)
         output_path = os.path.join(OUTPUT_DIR, os.path.splitext(filename)[0] + ".json")
         logging.info(f"Processing '{filename}'...")
         try:
-            result = extract_universal_outline(pdf_path)
+            file_start = time.perf_counter()
+            result, path = extract_outline_and_path(pdf_path, lazy=not args.eager,
+                                                    validate_toc=args.validate_toc)
             with open(output_path, 'w', encoding='utf-8') as f:
                 json.dump(result, f, indent=4, ensure_ascii=False)
-            logging.info(f"✅ Successfully created JSON for '{filename}'")
+            path_counts[path['outline']] += 1
+            logging.info(f"✅ Successfully created JSON for '{filename}' "
+                         f"(outline: {path['outline']}, title: {path['title']}, "
+                         f"{time.perf_counter() - file_start:.3f}s)")
         except Exception as e:
-            logging.error(f"❌ Failed to process '{filename}'. Error: {e}", exc_info=True)
\ No newline at end of file
+            logging.error(f"❌ Failed to process '{filename}'. Error: {e}", exc_info=True)
+
+    if pdf_files:
+        elapsed = time.perf_counter() - start_time
+        logging.info(f"Processed {len(pdf_files)} PDFs in {elapsed:.2f}s "
+                     f"({len(pdf_files) / elapsed:.1f} docs/s). Outline paths: {dict(path_counts)}")
\ No newline at end of file
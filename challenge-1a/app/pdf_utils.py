@@ -62,6 +62,60 @@ def extract_title_from_content(doc):
         return None
 
 
+def extract_title_from_metadata(doc):
+    """Returns the title stored in the PDF metadata, or None if it is missing or looks auto-generated."""
+    title = ((doc.metadata or {}).get("title") or "").strip()
+    if len(title) < 4 or title.lower().startswith(("microsoft word", "untitled")) or title.lower().endswith((".doc", ".docx", ".pdf")):
+        return None
+    return title
+
+
+def extract_title_from_first_page(doc, clip=None):
+    """
+    Joins the spans on the first page whose font size is within 5% of the largest one.
+    If clip is given, only that region of the page is decoded.
+    """
+    first_page = doc[0]
+    blocks = first_page.get_text("dict", sort=True, clip=clip)["blocks"]
+    font_sizes = [s['size'] for b in blocks if 'lines' in b for l in b['lines'] for s in l['spans']]
+    if not font_sizes:
+        raise Exception("No text found on first page")
+    largest_size = max(font_sizes)
+    title_texts = [
+        s['text'].strip()
+        for b in blocks if 'lines' in b
+        for l in b['lines']
+        for s in l['spans']
+        if abs(s['size'] - largest_size) < largest_size * 0.05
+    ]
+    return " ".join(dict.fromkeys(title_texts))  # Use dict.fromkeys to remove duplicates
+
+
+def _normalize_for_match(text):
+    return re.sub(r'[^a-z0-9]+', ' ', text.lower()).strip()
+
+
+def validate_toc_outline(doc, outline, min_match_ratio=0.5):
+    """
+    Checks that the TOC entries point at pages which actually contain their titles.
+    Only the pages referenced by the TOC are decoded, each at most once and in full,
+    in plain text mode. Scanned PDFs (no text layer) and bookmarks whose labels differ
+    from the printed headings fail this check, so callers should treat it as opt-in.
+    """
+    page_texts = {}
+    matched = 0
+    for entry in outline:
+        page_index = entry['page'] - 1
+        if not 0 <= page_index < doc.page_count:
+            continue
+        if page_index not in page_texts:
+            page_texts[page_index] = _normalize_for_match(doc[page_index].get_text("text"))
+        title = _normalize_for_match(entry['text'])
+        if title and title in page_texts[page_index]:
+            matched += 1
+    return matched >= len(outline) * min_match_ratio
+
+
 def extract_outline_from_toc(doc):
     """Extracts the outline from the PDF's embedded Table of Contents (bookmarks)."""
     toc = doc.get_toc()
@@ -0,0 +1,403 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import signal
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+from main import extract_outline_and_path
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MAX_HEADER_BYTES = 64 * 1024
+# Seconds a worker may overrun its deadline before the whole pool is killed and replaced
+DEFAULT_KILL_GRACE = 5.0
+# Upper bound for the ?timeout= a client may ask for
+DEFAULT_MAX_TIMEOUT = 300.0
+
+HTTP_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity",
+    500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout",
+}
+
+
+def _warm_up():
+    """Runs once in every worker so the pool is fully forked before the first request."""
+    return os.getpid()
+
+
+class WorkerDeadlineExceeded(BaseException):
+    """
+    Raised inside a worker when an extraction runs past its deadline.
+    A BaseException, like KeyboardInterrupt, so the extractor's `except Exception` fallbacks do not swallow it.
+    """
+
+
+def _on_deadline(signum, frame):
+    raise WorkerDeadlineExceeded("Extraction exceeded its deadline.")
+
+
+def _extract_worker(pdf_bytes, filename, lazy, deadline_seconds):
+    """
+    Process-pool entry point: extracts the outline of an in-memory PDF.
+
+    A SIGALRM timer interrupts the extraction once deadline_seconds have
+    passed. The handler only runs between Python bytecodes, so a single
+    long MuPDF call can still overrun; the parent kills the pool for those.
+    """
+    start = time.perf_counter()
+    signal.signal(signal.SIGALRM, _on_deadline)
+    signal.setitimer(signal.ITIMER_REAL, max(deadline_seconds, 0.001))
+    try:
+        result, path = extract_outline_and_path(filename, lazy=lazy, pdf_bytes=pdf_bytes)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    return result, path, time.perf_counter() - start
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (seconds), in the cumulative style of Prometheus."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def snapshot(self):
+        cumulative, running = {}, 0
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            running += count
+            cumulative[bound] = running
+        return {"buckets": cumulative, "count": self.count, "sum": round(self.total, 6)}
+
+
+class OutlineService:
+    """
+    Asyncio front end that runs extract_universal_outline on a pre-forked process pool.
+
+    At most `workers` extractions run at once. Up to `max_queue` further
+    requests wait for a worker; anything beyond that is rejected straight away
+    with 503 so that upstream callers see backpressure instead of growing latency.
+
+    Every job gets its remaining timeout as a deadline inside the worker. A
+    worker that is still busy `kill_grace` seconds after that deadline has its
+    pool killed and replaced, as does a pool broken by a crashed worker; the
+    requests caught in it get 503.
+    """
+
+    def __init__(self, workers=None, max_queue=32, request_timeout=30.0, max_body_bytes=100 * 1024 * 1024,
+                 lazy=True, kill_grace=DEFAULT_KILL_GRACE, max_timeout=DEFAULT_MAX_TIMEOUT):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.request_timeout = request_timeout
+        self.max_body_bytes = max_body_bytes
+        self.lazy = lazy
+        self.kill_grace = kill_grace
+        self.max_timeout = max_timeout
+        self.executor = None
+        self._slots = None
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.counters = {"accepted": 0, "completed": 0, "rejected": 0, "timeouts": 0,
+                         "cancelled": 0, "failed": 0, "worker_crashes": 0, "pool_restarts": 0,
+                         "client_disconnects": 0}
+        self.latency = LatencyHistogram()  # end-to-end, including queueing
+        self.extract_latency = LatencyHistogram()  # time spent inside the worker
+        self.started_at = time.time()
+
+    async def start(self):
+        self._slots = asyncio.Semaphore(self.workers)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        await self._start_workers(self.executor)
+
+    async def _start_workers(self, executor):
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(executor, _warm_up) for _ in range(self.workers)))
+        logging.info(f"Process pool ready with {len(set(pids))} workers.")
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _replace_pool(self, broken_executor, reason):
+        """Kills the workers of broken_executor and starts a fresh pool, once per broken pool."""
+        if broken_executor is not self.executor:
+            return  # Already replaced by another request
+        logging.error(f"Restarting process pool: {reason}")
+        self.counters["pool_restarts"] += 1
+        # ProcessPoolExecutor has no public way to kill a busy worker
+        for process in list((broken_executor._processes or {}).values()):
+            process.kill()
+        broken_executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        asyncio.ensure_future(self._start_workers(self.executor))
+
+    def _kill_if_still_running(self, job, executor):
+        if not job.done():
+            self._replace_pool(executor, f"a worker overran its deadline by {self.kill_grace}s")
+
+    def metrics(self):
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            **self.counters,
+            "latency_seconds": self.latency.snapshot(),
+            "extract_latency_seconds": self.extract_latency.snapshot(),
+        }
+
+    async def extract(self, pdf_bytes, filename, timeout):
+        """Admits, queues and runs one extraction. Returns (status, payload)."""
+        if self.queue_depth + self.in_flight >= self.workers + self.max_queue:
+            self.counters["rejected"] += 1
+            return 503, {"error": "Server is at capacity, retry later."}
+
+        # Reserve the queue place before the first await, so a burst of
+        # concurrent requests cannot all pass the capacity check above
+        self.queue_depth += 1
+        ticket = {"queued": True}
+        self.counters["accepted"] += 1
+        start = time.perf_counter()
+        try:
+            # The timeout covers both waiting for a worker and the extraction itself
+            result, path, extract_seconds = await asyncio.wait_for(
+                self._run_in_worker(pdf_bytes, filename, start + timeout, ticket), timeout)
+        except (asyncio.TimeoutError, WorkerDeadlineExceeded):
+            self.counters["timeouts"] += 1
+            return 504, {"error": f"Extraction did not finish within {timeout}s."}
+        except asyncio.CancelledError:
+            self.counters["cancelled"] += 1
+            raise
+        except BrokenProcessPool:
+            self.counters["worker_crashes"] += 1
+            return 503, {"error": "The extraction worker crashed or was restarted, retry later."}
+        except Exception as e:
+            self.counters["failed"] += 1
+            logging.error(f"❌ Failed to process '{filename}'. Error: {e}")
+            return 422, {"error": str(e)}
+        finally:
+            if ticket["queued"]:
+                self.queue_depth -= 1
+
+        self.counters["completed"] += 1
+        self.extract_latency.observe(extract_seconds)
+        self.latency.observe(time.perf_counter() - start)
+        return 200, {**result, "path": path}
+
+    async def _run_in_worker(self, pdf_bytes, filename, deadline, ticket):
+        await self._slots.acquire()
+        ticket["queued"] = False
+        self.queue_depth -= 1
+        self.in_flight += 1
+
+        executor = self.executor
+        try:
+            job = executor.submit(_extract_worker, pdf_bytes, filename, self.lazy, deadline - time.perf_counter())
+        except BrokenProcessPool:
+            self._release_slot()
+            self._replace_pool(executor, "the process pool is broken")
+            raise
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wrap_future(job)
+        except BrokenProcessPool:
+            self._replace_pool(executor, "a worker process died")
+            raise
+        finally:
+            if job.cancel() or job.done():
+                self._release_slot()
+            else:
+                # The job is running: its slot is freed when it finishes, and if it
+                # ignores its in-worker deadline the pool is killed and replaced.
+                job.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release_slot))
+                overrun = max(deadline - time.perf_counter(), 0) + self.kill_grace
+                loop.call_later(overrun, self._kill_if_still_running, job, executor)
+
+    def _release_slot(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    async def handle_connection(self, reader, writer):
+        """Serves HTTP/1.1 requests (with keep-alive) on one connection."""
+        pushback = b""
+        try:
+            while True:
+                request = await self._read_request(reader, pushback)
+                if request is None:
+                    break
+                method, target, headers, body_or_status = request
+                if isinstance(body_or_status, int):
+                    await self._respond(writer, body_or_status, {"error": HTTP_REASONS[body_or_status]}, close=True)
+                    break
+                response, pushback = await self._until_disconnect(
+                    reader, self._route(method, target, headers, body_or_status))
+                if response is None:
+                    break
+                status, payload = response
+                close = headers.get("connection", "").lower() == "close"
+                await self._respond(writer, status, payload, close=close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _until_disconnect(self, reader, request):
+        """
+        Runs the request coroutine while watching the connection for EOF.
+
+        If the client goes away first, the request is cancelled, which cancels a
+        queued job and frees its worker slot, and (None, b"") is returned.
+        Otherwise returns (response, pushback), where pushback holds the byte
+        of a pipelined next request read while watching.
+        """
+        task = asyncio.ensure_future(request)
+        watcher = asyncio.ensure_future(reader.read(1))
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if not watcher.done():
+            watcher.cancel()
+            try:
+                await watcher
+            except asyncio.CancelledError:
+                pass
+            return task.result(), b""
+
+        try:
+            pushback = watcher.result()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pushback = b""
+        if not pushback and not task.done():
+            self.counters["client_disconnects"] += 1
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            return None, b""
+        return await task, pushback
+
+    async def _read_request(self, reader, pushback=b""):
+        try:
+            head = pushback + await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            return "", "", {}, 400
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            return "", "", {}, 400
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        if method != "POST":
+            return method, target, headers, b""
+        if "content-length" not in headers:
+            return method, target, headers, 411
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            return method, target, headers, 400
+        if length < 0:
+            return method, target, headers, 400
+        if length > self.max_body_bytes:
+            return method, target, headers, 413
+        return method, target, headers, await reader.readexactly(length)
+
+    async def _route(self, method, target, headers, body):
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, {"status": "ok"}
+        if url.path == "/metrics":
+            return 200, self.metrics()
+        if url.path != "/outline":
+            return 404, {"error": f"Unknown path '{url.path}'."}
+        if method != "POST":
+            return 405, {"error": "Use POST with the PDF bytes as the request body."}
+        if not body:
+            return 400, {"error": "Empty request body."}
+        query = parse_qs(url.query)
+        try:
+            timeout = float(query.get("timeout", [self.request_timeout])[0])
+        except ValueError:
+            return 400, {"error": "timeout must be a number of seconds."}
+        if not math.isfinite(timeout) or timeout <= 0:
+            return 400, {"error": "timeout must be a finite number of seconds greater than 0."}
+        timeout = min(timeout, self.max_timeout)
+        filename = headers.get("x-filename", "upload.pdf")
+        return await self.extract(body, filename, timeout)
+
+    async def _respond(self, writer, status, payload, close=False):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'close' if close else 'keep-alive'}\r\n")
+        if status == 503:
+            head += "Retry-After: 1\r\n"
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
+
+
+async def serve(service, host=None, port=None, unix_socket=None):
+    await service.start()
+    if unix_socket:
+        server = await asyncio.start_unix_server(service.handle_connection, path=unix_socket, limit=MAX_HEADER_BYTES)
+        logging.info(f"Listening on unix:{unix_socket}")
+    else:
+        server = await asyncio.start_server(service.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        logging.info(f"Listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+# --- Main Execution Block ---
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+    parser = argparse.ArgumentParser(description="PDF Outline Extraction Service")
+    parser.add_argument('--host', type=str, default="0.0.0.0", help='Host to bind')
+    parser.add_argument('--port', type=int, default=8080, help='TCP port to bind')
+    parser.add_argument('--unix-socket', type=str, default=None, help='Serve on this Unix socket instead of TCP')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--max-queue', type=int, default=32, help='Requests allowed to wait for a worker before 503s')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Default per-request timeout in seconds')
+    parser.add_argument('--eager', action='store_true', help='Disable the lazy TOC-first path')
+    parser.add_argument('--max-timeout', type=float, default=DEFAULT_MAX_TIMEOUT,
+                        help='Largest ?timeout= a client may request; longer timeouts are capped')
+    parser.add_argument('--kill-grace', type=float, default=DEFAULT_KILL_GRACE,
+                        help='Seconds past its deadline before a stuck worker pool is killed and replaced')
+    args = parser.parse_args()
+
+    service = OutlineService(workers=args.workers, max_queue=args.max_queue,
+                             request_timeout=args.timeout, lazy=not args.eager, kill_grace=args.kill_grace,
+                             max_timeout=args.max_timeout)
+    try:
+        asyncio.run(serve(service, host=args.host, port=args.port, unix_socket=args.unix_socket))
+    except KeyboardInterrupt:
+        logging.info("Shutting down.")
@@ -0,0 +1,96 @@
+import os
+import json
+import time
+from statistics import median
+from intelligence_core import DocumentAnalyst
+from lexical_index import BM25Index
+from main_1b import extract_all_sections
+
+
+def section_key(section):
+    return (section['document'], section['page_number'], section['section_title'])
+
+
+def ranking_agreement(reference, candidate, k=10):
+    """
+    Compares a ranking against the dense-only reference.
+
+    Returns overlap@k (fraction of the reference top-k found in the candidate
+    top-k) and whether both rankings agree on the top section.
+    """
+    ref_top = [section_key(s) for s in reference[:k]]
+    cand_top = [section_key(s) for s in candidate[:k]]
+    overlap = len(set(ref_top) & set(cand_top)) / max(len(ref_top), 1)
+    top1 = bool(ref_top and cand_top and ref_top[0] == cand_top[0])
+    return overlap, top1
+
+
+def timed_rank(analyst, query_text, sections, repeats=3, **kwargs):
+    """Ranks the sections `repeats` times and returns the last ranking and the median time."""
+    timings = []
+    for _ in range(repeats):
+        # rank_sections writes 'importance_rank' into the dicts, so rank a copy
+        copies = [dict(s) for s in sections]
+        start = time.perf_counter()
+        ranked = analyst.rank_sections(query_text, copies, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return ranked, median(timings)
+
+
+def main():
+    import argparse
+
+    SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+    PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+    parser = argparse.ArgumentParser(description="Compare BM25-prefiltered ranking against dense-only ranking")
+    parser.add_argument('--collection', type=str, default='Collection 1', help='Collection name under input/')
+    parser.add_argument('--candidate-pools', type=int, nargs='+', default=[50, 100, 200],
+                        help='Candidate pool sizes to evaluate')
+    parser.add_argument('--top-k', type=int, default=10, help='k used for overlap@k')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per measurement; the median time is reported')
+    args = parser.parse_args()
+
+    INPUT_DIR = os.path.join(PROJECT_ROOT, 'input')
+    MODEL_PATH = os.path.join(PROJECT_ROOT, 'models', 'all-MiniLM-L6-v2')
+
+    with open(os.path.join(INPUT_DIR, f'{args.collection}.json'), 'r', encoding='utf-8') as f:
+        input_data = json.load(f)
+    persona = input_data.get(args.collection, {})
+    task = input_data.get("job_to_be_done", {}).get("task", "find relevant information")
+    query_text = (f"As a {persona.get('role', 'user')} with expertise in "
+                  f"{persona.get('expertise', 'general interest')}, I need to {task}.")
+    pdf_filenames = [d['filename'] for d in input_data.get("documents", []) if d.get('filename')]
+
+    section_index = BM25Index()
+    start = time.perf_counter()
+    sections = extract_all_sections(os.path.join(INPUT_DIR, args.collection), pdf_filenames,
+                                    lexical_index=section_index)
+    extract_time = time.perf_counter() - start
+    if not sections:
+        print("Error: No sections were extracted. Nothing to compare.")
+        return
+
+    analyst = DocumentAnalyst(model_path=MODEL_PATH)
+    # Warm-up run so one-off model start-up cost is not charged to the dense baseline
+    analyst.rank_sections(query_text, [dict(s) for s in sections[:8]])
+    dense_ranked, dense_time = timed_rank(analyst, query_text, sections, repeats=args.repeats)
+
+    results = [("dense", len(sections), dense_time, 1.0, True)]
+    for pool in args.candidate_pools:
+        for mode in ("prefilter", "fused"):
+            ranked, elapsed = timed_rank(analyst, query_text, sections, repeats=args.repeats,
+                                         lexical_index=section_index, candidate_pool=pool, mode=mode)
+            overlap, top1 = ranking_agreement(dense_ranked, ranked, k=args.top_k)
+            results.append((mode, pool, elapsed, overlap, top1))
+
+    print(f"\nExtracted and indexed {len(sections)} sections in {extract_time:.2f}s")
+    print(f"Rank times are the median of {args.repeats} runs after a warm-up.")
+    print(f"{'mode':<10} {'pool':>6} {'rank time (s)':>14} {'speedup':>8} {f'overlap@{args.top_k}':>11} {'top-1':>6}")
+    for mode, pool, elapsed, overlap, top1 in results:
+        speedup = dense_time / elapsed if elapsed else float('inf')
+        print(f"{mode:<10} {pool:>6} {elapsed:>14.3f} {speedup:>7.1f}x {overlap:>11.2f} {str(top1):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import fitz  # PyMuPDF
+
+DEFAULT_POOL_BYTES = 256 * 1024 * 1024
+# Rough per-object overheads used to estimate the footprint of a decoded page dict
+_SPAN_OVERHEAD_BYTES = 400
+_BLOCK_OVERHEAD_BYTES = 300
+
+
+def estimate_page_dict_bytes(page_dict):
+    """Cheap estimate of the memory held by a get_text("dict") result."""
+    total = 0
+    for block in page_dict.get("blocks", []):
+        total += _BLOCK_OVERHEAD_BYTES
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                total += _SPAN_OVERHEAD_BYTES + 2 * len(span["text"])
+        if "image" in block:
+            total += len(block["image"])
+    return total
+
+
+def _file_key(path):
+    """Identifies a file by path, modification time and size, so a replaced file gets a new key."""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _doc_key(doc):
+    """
+    Returns the cache key for a document's pages, or None if its pages must not be cached.
+
+    The key is computed once per handle and kept on it, so it describes the
+    file as it was when first seen. Documents opened from memory have no
+    stable identity and are never cached.
+    """
+    key = getattr(doc, "_pool_key", None)
+    if key is None:
+        if not doc.name or not os.path.isfile(doc.name):
+            return None
+        key = _file_key(doc.name)
+        _remember_key(doc, key)
+    return key
+
+
+def _remember_key(doc, key):
+    try:
+        doc._pool_key = key
+    except AttributeError:
+        # Without a stored key the file is re-stat'ed on every lookup, which is still correct
+        pass
+
+
+class DocumentPool:
+    """
+    Process-wide LRU pool of open fitz.Document handles and decoded page dicts.
+
+    Documents and pages share one LRU list and one byte budget. Documents are
+    charged their file size, pages an estimate of their decoded dict. Handles
+    are lent out by open()/release() (or the document() context manager); an
+    evicted document is closed as soon as nobody holds it any more.
+
+    open() lends the same fitz.Document to every caller, and PyMuPDF documents
+    are not thread-safe. page_dict() decodes under a per-document lock, so it
+    may be called from any thread; any other use of a lent handle (doc[i],
+    get_toc(), ...) must stay on one thread at a time.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_POOL_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._holders = {}  # id(doc) -> number of open() calls not yet released
+        self._evicted_while_held = {}  # id(doc) -> doc, closed on last release
+        self._pooled_docs = {}  # id(doc) -> pool key of documents currently in the LRU
+        self._lock = threading.Lock()
+        self._fallback_decode_lock = threading.Lock()
+        self.counters = {
+            "doc_hits": 0, "doc_misses": 0,
+            "page_hits": 0, "page_misses": 0, "page_uncached": 0,
+            "evictions": 0, "evicted_bytes": 0, "closed_documents": 0,
+        }
+
+    def open(self, pdf_path: str):
+        """
+        Returns an open document for the path, reusing a pooled handle if the file is unchanged.
+        Every call must be paired with release(doc).
+        """
+        file_key = _file_key(pdf_path)
+        key = ("doc",) + file_key
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["doc_hits"] += 1
+                self._hold(entry[0])
+                return entry[0]
+            self.counters["doc_misses"] += 1
+
+        doc = fitz.open(file_key[0])
+        _remember_key(doc, file_key)
+        with self._lock:
+            self._hold(doc)
+            if key in self._entries:
+                # Another thread opened the same file meanwhile; keep its handle pooled
+                return doc
+            self._put(key, doc, file_key[2])
+        return doc
+
+    def release(self, doc):
+        """Returns a handle obtained from open(); evicted documents are closed on their last release."""
+        with self._lock:
+            holders = self._holders.get(id(doc), 0) - 1
+            if holders > 0:
+                self._holders[id(doc)] = holders
+                return
+            self._holders.pop(id(doc), None)
+            pending = self._evicted_while_held.pop(id(doc), None)
+            if pending is not None or not self._is_pooled(doc):
+                self._close(doc)
+
+    @contextmanager
+    def document(self, pdf_path: str):
+        """Context manager around open()/release()."""
+        doc = self.open(pdf_path)
+        try:
+            yield doc
+        finally:
+            self.release(doc)
+
+    def page_dict(self, doc, page_num: int):
+        """Returns doc[page_num].get_text("dict", sort=True), decoding each page at most once while pooled."""
+        doc_key = _doc_key(doc)
+        if doc_key is None:
+            with self._lock:
+                self.counters["page_uncached"] += 1
+            with self._decode_lock(doc):
+                return doc[page_num].get_text("dict", sort=True)
+
+        key = ("page",) + doc_key + (page_num,)
+        page_dict = self._lookup_page(key)
+        if page_dict is not None:
+            return page_dict
+
+        with self._decode_lock(doc):
+            # Another thread may have decoded the page while we waited for the document
+            page_dict = self._lookup_page(key)
+            if page_dict is not None:
+                return page_dict
+            with self._lock:
+                self.counters["page_misses"] += 1
+            page_dict = doc[page_num].get_text("dict", sort=True)
+        with self._lock:
+            self._put(key, page_dict, estimate_page_dict_bytes(page_dict))
+        return page_dict
+
+    def _lookup_page(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.counters["page_hits"] += 1
+            return entry[0]
+
+    def _decode_lock(self, doc):
+        """Returns the lock that serialises PyMuPDF calls on doc, creating it on first use."""
+        lock = getattr(doc, "_pool_decode_lock", None)
+        if lock is None:
+            with self._lock:
+                lock = getattr(doc, "_pool_decode_lock", None)
+                if lock is None:
+                    lock = threading.Lock()
+                    try:
+                        doc._pool_decode_lock = lock
+                    except AttributeError:
+                        # Cannot tag the handle; fall back to one lock for every decode
+                        lock = self._fallback_decode_lock
+        return lock
+
+    def _hold(self, doc):
+        self._holders[id(doc)] = self._holders.get(id(doc), 0) + 1
+
+    def _is_pooled(self, doc):
+        entry = self._entries.get(self._pooled_docs.get(id(doc)))
+        return entry is not None and entry[0] is doc
+
+    def _close(self, doc):
+        if not doc.is_closed:
+            doc.close()
+            self.counters["closed_documents"] += 1
+
+    def _drop(self, key, value):
+        if key[0] != "doc":
+            return
+        self._pooled_docs.pop(id(value), None)
+        if self._holders.get(id(value)):
+            self._evicted_while_held[id(value)] = value
+        else:
+            self._close(value)
+
+    def _put(self, key, value, size):
+        if key in self._entries:
+            self.current_bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        if key[0] == "doc":
+            self._pooled_docs[id(value)] = key
+        self.current_bytes += size
+        # Never evict the entry just added, even if it alone exceeds the budget
+        self._evict(keep=1)
+
+    def _evict(self, keep=0):
+        while self.current_bytes > self.max_bytes and len(self._entries) > keep:
+            evicted_key, (evicted_value, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.counters["evictions"] += 1
+            self.counters["evicted_bytes"] += evicted_size
+            self._drop(evicted_key, evicted_value)
+
+    def resize(self, max_bytes: int):
+        """Changes the byte budget, evicting least recently used entries if it shrank."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """Drops every pooled page and closes every pooled document that is not currently held."""
+        with self._lock:
+            for key, (value, _) in self._entries.items():
+                self._drop(key, value)
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Returns hit/miss/eviction counters and the current occupancy of the pool."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["held_documents"] = len(self._holders)
+            stats["current_bytes"] = self.current_bytes
+            stats["max_bytes"] = self.max_bytes
+        for kind in ("doc", "page"):
+            lookups = stats[f"{kind}_hits"] + stats[f"{kind}_misses"]
+            stats[f"{kind}_hit_rate"] = round(stats[f"{kind}_hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_document_pool():
+    """Returns the process-wide pool, creating it with the DOCUMENT_POOL_BYTES budget (or the default) if needed."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DocumentPool(int(os.environ.get("DOCUMENT_POOL_BYTES", DEFAULT_POOL_BYTES)))
+        return _pool
+
+
+def configure_document_pool(max_bytes: int):
+    """Sets the byte budget of the process-wide pool, evicting entries if it shrank."""
+    pool = get_document_pool()
+    pool.resize(max_bytes)
+    return pool
@@ -1,13 +1,37 @@
-# src/intelligence_core.py
 from sentence_transformers import SentenceTransformer, util
 import torch
 
+RETRIEVAL_MODES = ("dense", "prefilter", "fused")
+
+
 class DocumentAnalyst:
     def __init__(self, model_path: str):
         # Load the model from the local path for offline use
         self.model = SentenceTransformer(model_path)
 
-    def rank_sections(self, persona_job_text: str, document_sections: list):
+    def select_candidates(self, persona_job_text: str, num_sections: int, lexical_index, candidate_pool: int):
+        """
+        Uses the BM25 index to pick the candidate pool that is sent to the dense model.
+
+        Returns a (candidate_ids, bm25_scores) tuple. If fewer than candidate_pool
+        sections match the query lexically, the pool is padded with the remaining
+        sections in document order so the dense model still sees enough candidates.
+        """
+        hits = lexical_index.search(persona_job_text, top_k=candidate_pool)
+        bm25_scores = dict(hits)
+        candidate_ids = [doc_id for doc_id, _ in hits]
+        if len(candidate_ids) < candidate_pool:
+            for doc_id in range(num_sections):
+                if len(candidate_ids) >= candidate_pool:
+                    break
+                if doc_id not in bm25_scores:
+                    candidate_ids.append(doc_id)
+                    bm25_scores[doc_id] = 0.0
+        return candidate_ids, bm25_scores
+
+    def rank_sections(self, persona_job_text: str, document_sections: list,
+                      lexical_index=None, candidate_pool: int = None,
+                      mode: str = "dense", fusion_weight: float = 0.7, return_embeddings: bool = False):
         """
         Ranks document sections based on their relevance to a persona/job.
 
@@ -15,33 +39,193 @@ class DocumentAnalyst:
             persona_job_text: A string combining the persona and job description.
             document_sections: A list of dicts, where each dict has 'doc_name',
                                'title', 'page', and 'content'.
+            lexical_index: Optional BM25Index whose document ids match the
+                           positions in document_sections.
+            candidate_pool: Number of BM25 candidates to rerank with the dense
+                            model. None means every section.
+            mode: 'dense' (encode every section), 'prefilter' (dense rerank of
+                  the BM25 candidate pool) or 'fused' (weighted blend of the
+                  normalised BM25 and cosine scores over the candidate pool).
+            fusion_weight: Weight of the cosine score in 'fused' mode.
+            return_embeddings: Also return the (N, dim) embedding matrix of the
+                               ranked sections; each section then gets an
+                               'embedding_row' key indexing into it.
 
         Returns:
-            A list of ranked sections with scores.
+            A list of ranked sections with scores, or a (ranked_sections,
+            embeddings) tuple if return_embeddings is set. In 'prefilter' and
+            'fused' modes only the candidate pool is returned.
         """
         if not document_sections or not persona_job_text:
-            return []
+            return ([], None) if return_embeddings else []
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}'. Expected one of {RETRIEVAL_MODES}.")
+        if mode != "dense" and lexical_index is None:
+            raise ValueError(f"Retrieval mode '{mode}' requires a lexical_index.")
+
+        candidate_ids = list(range(len(document_sections)))
+        bm25_scores = {}
+        if mode != "dense":
+            pool = candidate_pool or len(document_sections)
+            print(f" - Selecting up to {pool} BM25 candidates...")
+            candidate_ids, bm25_scores = self.select_candidates(
+                persona_job_text, len(document_sections), lexical_index, pool)
+        candidates = [document_sections[i] for i in candidate_ids]
 
         # Encode the query (persona + job)
         print(" - Encoding query...")
         query_embedding = self.model.encode(persona_job_text, convert_to_tensor=True)
 
-        # Encode all the document sections' content
+        # Encode all the candidate sections' content
+        section_embeddings = self.encode_sections(candidates)
+
+        # Calculate cosine similarity
+        print(" - Calculating similarity scores...")
+        cosine_scores = util.cos_sim(query_embedding, section_embeddings)[0]
+
+        if mode == "fused":
+            lexical = torch.tensor([bm25_scores[i] for i in candidate_ids], dtype=cosine_scores.dtype,
+                                   device=cosine_scores.device)
+            cosine_scores = fusion_weight * _min_max(cosine_scores) + (1 - fusion_weight) * _min_max(lexical)
+
+        if not return_embeddings:
+            return _attach_scores(candidates, cosine_scores.tolist())
+        return _attach_scores(candidates, cosine_scores.tolist(), with_rows=True), section_embeddings
+
+    def encode_sections(self, document_sections: list):
+        """Encodes the content of every section into an (N, dim) embedding tensor."""
         print(f" - Encoding {len(document_sections)} document sections...")
         section_contents = [section['content'] for section in document_sections]
-        section_embeddings = self.model.encode(section_contents, convert_to_tensor=True, show_progress_bar=True)
+        return self.model.encode(section_contents, convert_to_tensor=True, show_progress_bar=True)
+
+    def rank_sections_batch(self, queries: list, document_sections: list, top_k: int = None,
+                            section_embeddings=None):
+        """
+        Ranks document sections against several persona/job queries at once.
+
+        All queries are encoded in a single batch and scored against the shared
+        section embedding matrix with one matrix multiply.
+
+        Args:
+            queries: A list of persona/job query strings.
+            document_sections: Same format as for rank_sections.
+            top_k: Number of sections to return per query. None returns all.
+            section_embeddings: Optional precomputed output of encode_sections,
+                                so a collection only has to be encoded once.
+
+        Returns:
+            A list with one ranked list per query, in query order. Each ranked
+            list holds copies of the section dicts and matches what
+            rank_sections returns for that query on its own.
+        """
+        if not queries:
+            return []
+        if not document_sections:
+            return [[] for _ in queries]
+
+        if section_embeddings is None:
+            section_embeddings = self.encode_sections(document_sections)
+
+        print(f" - Encoding {len(queries)} queries...")
+        query_embeddings = self.model.encode(queries, convert_to_tensor=True)
 
-        # Calculate cosine similarity
         print(" - Calculating similarity scores...")
-        cosine_scores = util.cos_sim(query_embedding, section_embeddings)
-
-        # Add scores to each section and sort
-        ranked_sections = []
-        for i, section in enumerate(document_sections):
-            section['importance_rank'] = round(cosine_scores[0][i].item(), 4) # Add score
-            ranked_sections.append(section)
-        
-        # Sort by rank in descending order
-        ranked_sections.sort(key=lambda x: x['importance_rank'], reverse=True)
-        
-        return ranked_sections
\ No newline at end of file
+        cosine_scores = util.cos_sim(query_embeddings, section_embeddings)
+
+        results = []
+        for query, scores in zip(queries, cosine_scores):
+            if not query:
+                results.append([])
+                continue
+            candidate_ids = _top_k_candidates(scores, top_k)
+            candidates = [dict(document_sections[i]) for i in candidate_ids.tolist()]
+            ranked = _attach_scores(candidates, scores[candidate_ids].tolist())
+            results.append(ranked[:top_k] if top_k is not None else ranked)
+        return results
+
+
+def _top_k_candidates(scores, top_k):
+    """
+    Returns, in ascending index order, a small set of indices guaranteed to
+    contain the top_k sections as ranked by rank_sections.
+
+    rank_sections sorts by the score rounded to 4 decimals and keeps document
+    order on ties, so every score within 1e-4 of the k-th best raw score is
+    kept; anything lower cannot round up to the k-th rounded score.
+    """
+    if top_k is None or top_k >= scores.shape[0]:
+        return torch.arange(scores.shape[0], device=scores.device)
+    if top_k <= 0:
+        return torch.arange(0, device=scores.device)
+    kth_best = torch.topk(scores, top_k).values[-1]
+    return torch.nonzero(scores >= kth_best - 1e-4).flatten()
+
+
+def mmr_select(embeddings, relevance, k: int, relevance_weight: float = 0.7, candidates=None):
+    """
+    Picks k relevant but mutually dissimilar items with maximal marginal relevance.
+
+    Args:
+        embeddings: An (N, dim) tensor of item embeddings.
+        relevance: Relevance scores (e.g. cosine similarity to the query), one
+                   per item, or one per candidate if candidates is given.
+        k: Number of items to select.
+        relevance_weight: Trade-off between relevance (1.0) and diversity (0.0).
+        candidates: Optional 1-D tensor of the rows of embeddings that may be
+                    picked. The matrix is used in place, so no subset is copied.
+
+    Returns:
+        A list of selected row indices of embeddings in selection order. The
+        first pick is always the most relevant item.
+    """
+    num_items = embeddings.shape[0]
+    device = embeddings.device
+    if candidates is None:
+        candidates = torch.arange(num_items, device=device)
+    k = min(k, candidates.shape[0])
+    if k <= 0:
+        return []
+
+    dtype = embeddings.dtype if embeddings.is_floating_point() else torch.float32
+    embeddings = embeddings.to(dtype)
+    # Cosine similarity from raw dot products and row norms; avoids a normalised (N, dim) copy
+    norms = embeddings.norm(dim=1).clamp_min(1e-12)
+    scores = torch.full((num_items,), float('-inf'), dtype=dtype, device=device)
+    scores[candidates] = relevance_weight * relevance.to(device, dtype=dtype)
+    # Highest similarity of every item to anything already selected
+    max_similarity = torch.zeros(num_items, dtype=dtype, device=device)
+
+    selected = []
+    for _ in range(k):
+        best = int(torch.argmax(scores - (1 - relevance_weight) * max_similarity))
+        selected.append(best)
+        scores[best] = float('-inf')
+        # One (N, dim) x (dim,) product per pick keeps the whole pass O(k * N * dim)
+        similarity = (embeddings @ embeddings[best]) / (norms * norms[best])
+        max_similarity = torch.maximum(max_similarity, similarity)
+    return selected
+
+
+def _attach_scores(sections, scores, with_rows=False):
+    """
+    Writes the rounded score (and, if with_rows, the section's row in the
+    embedding matrix) into each section and sorts them best first.
+    """
+    ranked_sections = []
+    for i, (section, score) in enumerate(zip(sections, scores)):
+        section['importance_rank'] = round(score, 4) # Add score
+        if with_rows:
+            section['embedding_row'] = i
+        ranked_sections.append(section)
+
+    # Sort by rank in descending order
+    ranked_sections.sort(key=lambda x: x['importance_rank'], reverse=True)
+    return ranked_sections
+
+
+def _min_max(scores):
+    """Rescales a 1-D tensor to [0, 1]; a constant tensor maps to all zeros."""
+    low, high = scores.min(), scores.max()
+    if high - low == 0:
+        return torch.zeros_like(scores)
+    return (scores - low) / (high - low)
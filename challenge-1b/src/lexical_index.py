@@ -0,0 +1,103 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+TOKEN_REGEX = re.compile(r"[a-z0-9]+")
+
+# Small stopword list; the persona/job query is phrased as a sentence
+# ("As a ... I need to ...") so these would otherwise match everything.
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have',
+    'i', 'in', 'is', 'it', 'its', 'me', 'my', 'need', 'of', 'on', 'or', 'that',
+    'the', 'this', 'to', 'was', 'we', 'were', 'will', 'with', 'you', 'your'
+}
+
+
+def tokenize(text):
+    """Lowercases text and splits it into alphanumeric terms, dropping stopwords."""
+    return [t for t in TOKEN_REGEX.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    A small in-process inverted index with Okapi BM25 scoring.
+
+    Documents are identified by the order in which they are added, so the ids
+    line up with the positions of sections/sentences in the list that is later
+    passed to DocumentAnalyst.rank_sections.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)  # term -> [(doc_id, term_frequency), ...]
+        self.doc_lengths = []
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, text: str) -> int:
+        """Indexes a piece of text and returns its document id."""
+        doc_id = len(self.doc_lengths)
+        terms = tokenize(text)
+        for term, tf in Counter(terms).items():
+            self.postings[term].append((doc_id, tf))
+        self.doc_lengths.append(len(terms))
+        self.total_length += len(terms)
+        return doc_id
+
+    def add_all(self, texts) -> None:
+        """Indexes every text in an iterable, in order."""
+        for text in texts:
+            self.add(text)
+
+    def scores(self, query: str) -> dict:
+        """Returns a {doc_id: bm25_score} dict for every document matching the query."""
+        num_docs = len(self.doc_lengths)
+        if not num_docs:
+            return {}
+        avg_length = self.total_length / num_docs or 1.0
+        doc_scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings:
+                norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length
+                doc_scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return doc_scores
+
+    def search(self, query: str, top_k: int = 100) -> list:
+        """Returns up to top_k (doc_id, score) pairs, best first. Only matching documents are returned."""
+        doc_scores = self.scores(query)
+        ranked = sorted(doc_scores.items(), key=lambda x: (-x[1], x[0]))
+        return ranked[:top_k]
+
+    def restrict(self, doc_ids):
+        """Returns a view that searches only doc_ids, renumbered to their positions in that list."""
+        return BM25View(self, doc_ids)
+
+
+class BM25View:
+    """
+    A subset of a BM25Index, searchable like the index itself.
+
+    Scores use the full index's term statistics; ids returned by search are
+    positions in the doc_ids list the view was created with.
+    """
+
+    def __init__(self, index, doc_ids):
+        self.index = index
+        self.positions = {doc_id: pos for pos, doc_id in enumerate(doc_ids)}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def search(self, query: str, top_k: int = 100) -> list:
+        doc_scores = self.index.scores(query)
+        hits = [(self.positions[doc_id], score) for doc_id, score in doc_scores.items() if doc_id in self.positions]
+        hits.sort(key=lambda x: (-x[1], x[0]))
+        return hits[:top_k]
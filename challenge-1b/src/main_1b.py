@@ -1,15 +1,20 @@
 import os
 import json
 import re
-import fitz  # PyMuPDF
+import torch
 from datetime import datetime, timezone
-from intelligence_core import DocumentAnalyst
+from intelligence_core import DocumentAnalyst, RETRIEVAL_MODES, mmr_select
+from lexical_index import BM25Index
+from document_pool import DEFAULT_POOL_BYTES, configure_document_pool, get_document_pool
 from pdf_utils import extract_outline_with_heuristics
 
 def get_section_text(doc, outline):
     """
     Extracts the full text content for each section defined in the outline.
+    Decoded pages come from the shared document pool, so pages spanned by
+    neighbouring sections are only decoded once.
     """
+    pool = get_document_pool()
     for i, section in enumerate(outline):
         start_page = section['page'] - 1
         end_page = doc.page_count - 1
@@ -21,7 +26,7 @@ def get_section_text(doc, outline):
                 end_page = next_section['page'] - 1
             else:
                 end_page = start_page
-                for block in doc[start_page].get_text("dict", sort=True)["blocks"]:
+                for block in pool.page_dict(doc, start_page)["blocks"]:
                     if "lines" in block:
                         block_text = "".join(span['text'] for line in block['lines'] for span in line['spans']).strip()
                         if next_section['text'] in block_text:
@@ -30,17 +35,16 @@ def get_section_text(doc, outline):
         
         content = []
         for page_num in range(start_page, end_page + 1):
-            page = doc[page_num]
+            blocks = pool.page_dict(doc, page_num)["blocks"]
             current_section_y0 = 0
             if page_num == start_page:
-                 for block in page.get_text("dict", sort=True)["blocks"]:
+                 for block in blocks:
                     if "lines" in block:
                         block_text = "".join(span['text'] for line in block['lines'] for span in line['spans']).strip()
                         if section['text'] in block_text:
                             current_section_y0 = block['bbox'][3] 
                             break
 
-            blocks = page.get_text("dict", sort=True)["blocks"]
             for block in blocks:
                 if "lines" in block:
                     block_y0 = block['bbox'][1]
@@ -55,33 +59,53 @@ def get_section_text(doc, outline):
         
     return outline
 
+def split_into_sentences(content, section_title):
+    """Splits section content into sentences, filtering out short strings and the title itself."""
+    sentences = []
+    for sentence in re.split(r'(?<=[.?!])\s+', content):
+        clean_sentence = sentence.strip()
+        # **IMPROVEMENT**: Filter out short strings and sentences that are just the title
+        if clean_sentence and len(clean_sentence.split()) > 3 and clean_sentence.lower() != section_title.lower():
+            sentences.append(clean_sentence)
+    return sentences
+
 # --- IMPROVED FUNCTION FOR SUB-SECTION ANALYSIS ---
-def perform_sub_section_analysis(sections_to_analyze, analyst, query_text, num_sub_sections=5):
+def perform_sub_section_analysis(sections_to_analyze, analyst, query_text, num_sub_sections=5,
+                                 retrieval_mode="dense", candidate_pool=None, sentence_index=None):
     """
     Analyzes the content of a diverse pool of sections to find the most relevant sentences.
+    If a sentence_index built by extract_all_sections is given, the BM25 modes
+    search it instead of indexing the pool's sentences again.
     """
     print(f"\nPerforming sub-section analysis on {len(sections_to_analyze)} diverse sections...")
     all_sentences = []
-    
+    sentence_ids = []
+
     # 1. Split content into sentences, filtering out titles
     for section in sections_to_analyze:
-        sentences = re.split(r'(?<=[.?!])\s+', section['content'])
-        for sentence in sentences:
-            clean_sentence = sentence.strip()
-            # **IMPROVEMENT**: Filter out short strings and sentences that are just the title
-            if clean_sentence and len(clean_sentence.split()) > 3 and clean_sentence.lower() != section['section_title'].lower():
-                all_sentences.append({
-                    "content": clean_sentence,
-                    "document": section['document'],
-                    "page_number": section['page_number']
-                })
+        sentences = split_into_sentences(section['content'], section['section_title'])
+        for clean_sentence in sentences:
+            all_sentences.append({
+                "content": clean_sentence,
+                "document": section['document'],
+                "page_number": section['page_number']
+            })
+        sentence_ids.extend(section.get('sentence_ids', []))
 
     if not all_sentences:
         print(" - No suitable sentences found for sub-section analysis.")
         return []
 
-    # 2. Rank the sentences
-    ranked_sentences = analyst.rank_sections(query_text, all_sentences)
+    # 2. Rank the sentences (optionally BM25-prefiltered over a sentence-level index)
+    lexical_index = None
+    if retrieval_mode != "dense":
+        if sentence_index is not None and len(sentence_ids) == len(all_sentences):
+            lexical_index = sentence_index.restrict(sentence_ids)
+        else:
+            lexical_index = BM25Index()
+            lexical_index.add_all(s['content'] for s in all_sentences)
+    ranked_sentences = analyst.rank_sections(query_text, all_sentences, lexical_index=lexical_index,
+                                             candidate_pool=candidate_pool, mode=retrieval_mode)
     
     # 3. Format top N sentences, ensuring no duplicates
     sub_section_results = []
@@ -103,45 +127,74 @@ def perform_sub_section_analysis(sections_to_analyze, analyst, query_text, num_s
     print(f"✅ Sub-section analysis complete. Found {len(sub_section_results)} unique refined snippets.")
     return sub_section_results
 
-# --- NEW HELPER FUNCTION TO DIVERSIFY SECTION POOL ---
-def create_diverse_section_pool(ranked_sections):
+# --- HELPER FUNCTION TO DIVERSIFY SECTION POOL ---
+def create_diverse_section_pool(ranked_sections, embeddings, pool_size=5, relevance_weight=0.7):
     """
-    Selects a variety of sections based on keywords to create a balanced pool for analysis.
+    Selects relevant but mutually dissimilar sections with maximal marginal relevance.
+    embeddings is the matrix returned by rank_sections(..., return_embeddings=True);
+    each section's 'embedding_row' indexes into it.
     """
     print("\nCreating a diverse pool of sections for deeper analysis...")
-    
-    diverse_pool = []
+
+    # Keep only the best-ranked section for each title
+    candidates = []
     seen_titles = set()
+    for section in ranked_sections:
+        if section['section_title'] not in seen_titles:
+            seen_titles.add(section['section_title'])
+            candidates.append(section)
 
-    # Keywords to categorize sections
-    category_keywords = {
-        'activity': ['tours', 'things to do', 'adventures', 'sports', 'nightlife', 'hiking', 'shopping', 'experiences'],
-        'food': ['cuisine', 'restaurants', 'dishes', 'culinary', 'wine', 'food'],
-        'place': ['cities', 'city', 'marseille', 'nice', 'avignon', 'history', 'sites'],
-        'logistics': ['tips', 'packing', 'hotels', 'guide', 'introduction', 'conclusion', 'planning']
-    }
+    if not candidates:
+        print(" - Diverse pool contains 0 sections.")
+        return []
+
+    by_row = {section['embedding_row']: section for section in candidates}
+    rows = torch.tensor(list(by_row), device=embeddings.device)
+    relevance = torch.tensor([section['importance_rank'] for section in by_row.values()])
+    selected = mmr_select(embeddings, relevance, pool_size, relevance_weight=relevance_weight, candidates=rows)
+    diverse_pool = [by_row[row] for row in selected]
 
-    # Add the #1 overall ranked section regardless of category
-    if ranked_sections:
-        top_section = ranked_sections[0]
-        diverse_pool.append(top_section)
-        seen_titles.add(top_section['section_title'])
-
-    # Find the best section for each category
-    for category, keywords in category_keywords.items():
-        for section in ranked_sections:
-            if section['section_title'] not in seen_titles:
-                title_lower = section['section_title'].lower()
-                if any(keyword in title_lower for keyword in keywords):
-                    diverse_pool.append(section)
-                    seen_titles.add(section['section_title'])
-                    break # Move to the next category once one is found
-    
     print(f" - Diverse pool contains {len(diverse_pool)} sections.")
     return diverse_pool
 
 
-def main():
+def extract_all_sections(doc_dir, pdf_filenames, lexical_index=None, sentence_index=None):
+    """
+    Extracts sections with their content from every PDF in the list.
+    If a lexical_index is given, each section is indexed as it is extracted.
+    If a sentence_index is given, each section's sentences are indexed too and
+    their ids are stored under the section's 'sentence_ids' key.
+    """
+    all_sections = []
+    print("Processing PDF documents...")
+    for pdf_file in pdf_filenames:
+        pdf_path = os.path.join(doc_dir, pdf_file)
+        if not os.path.exists(pdf_path):
+            print(f"Warning: PDF file not found at {pdf_path}. Skipping.")
+            continue
+
+        print(f" - Extracting sections from {pdf_file}")
+        with get_document_pool().document(pdf_path) as doc:
+            outline = extract_outline_with_heuristics(doc)
+            sections_with_content = get_section_text(doc, outline)
+
+        for section in sections_with_content:
+            extracted = {
+                "document": pdf_file,
+                "page_number": section['page'],
+                "section_title": section['text'],
+                "content": section['content']
+            }
+            if lexical_index is not None:
+                lexical_index.add(f"{section['text']} {section['content']}")
+            if sentence_index is not None:
+                extracted['sentence_ids'] = [sentence_index.add(sentence) for sentence in
+                                             split_into_sentences(section['content'], section['text'])]
+            all_sections.append(extracted)
+    return all_sections
+
+
+def main(retrieval_mode="dense", candidate_pool=200, pool_bytes=None):
     # --- 1. Setup Paths ---
     try:
         SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -171,28 +224,14 @@ def main():
     doc_dir = os.path.join(INPUT_DIR, 'Collection 1')
     
     # --- 3. Extract Sections from all PDFs ---
-    all_sections = []
-    print("Processing PDF documents...")
-    for pdf_file in pdf_filenames:
-        pdf_path = os.path.join(doc_dir, pdf_file)
-        if not os.path.exists(pdf_path):
-            print(f"Warning: PDF file not found at {pdf_path}. Skipping.")
-            continue
-            
-        print(f" - Extracting sections from {pdf_file}")
-        doc = fitz.open(pdf_path)
-        
-        outline = extract_outline_with_heuristics(doc)
-        sections_with_content = get_section_text(doc, outline)
-        
-        for section in sections_with_content:
-            all_sections.append({
-                "document": pdf_file,
-                "page_number": section['page'],
-                "section_title": section['text'],
-                "content": section['content']
-            })
-        doc.close()
+    if pool_bytes is not None:
+        configure_document_pool(pool_bytes)
+    # The BM25 indexes are only read by the prefilter/fused modes; skip the tokenising otherwise
+    section_index, sentence_index = (None, None) if retrieval_mode == "dense" else (BM25Index(), BM25Index())
+    all_sections = extract_all_sections(doc_dir, pdf_filenames, lexical_index=section_index,
+                                        sentence_index=sentence_index)
+
+    print(f" - Document pool: {get_document_pool().stats()}")
 
     if not all_sections:
         print("Error: No sections were extracted from any PDF. Cannot proceed.")
@@ -201,11 +240,16 @@ def main():
     # --- 4. Rank Sections ---
     print("\nRanking sections based on relevance...")
     analyst = DocumentAnalyst(model_path=MODEL_PATH)
-    ranked_sections = analyst.rank_sections(query_text, all_sections)
+    ranked_sections, section_embeddings = analyst.rank_sections(
+        query_text, all_sections, lexical_index=section_index, candidate_pool=candidate_pool,
+        mode=retrieval_mode, return_embeddings=True)
 
     # --- 5. Perform Sub-Section Analysis on a DIVERSE pool of sections ---
-    sections_for_analysis = create_diverse_section_pool(ranked_sections)
-    sub_section_results = perform_sub_section_analysis(sections_for_analysis, analyst, query_text)
+    sections_for_analysis = create_diverse_section_pool(ranked_sections, section_embeddings)
+    sub_section_results = perform_sub_section_analysis(sections_for_analysis, analyst, query_text,
+                                                       retrieval_mode=retrieval_mode,
+                                                       candidate_pool=candidate_pool,
+                                                       sentence_index=sentence_index)
 
     # --- 6. Format Final Output ---
     output_data = {
@@ -238,4 +282,16 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Persona-driven document intelligence")
+    parser.add_argument('--retrieval', choices=RETRIEVAL_MODES, default="dense",
+                        help='dense: encode every section; prefilter: BM25 candidates reranked densely; '
+                             'fused: blend of BM25 and dense scores over the candidates')
+    parser.add_argument('--candidate-pool', type=int, default=200,
+                        help='Number of BM25 candidates passed to the dense model')
+    parser.add_argument('--pool-bytes', type=int, default=None,
+                        help=f'Byte budget of the in-memory document/page pool '
+                             f'(default: $DOCUMENT_POOL_BYTES or {DEFAULT_POOL_BYTES})')
+    args = parser.parse_args()
+    main(retrieval_mode=args.retrieval, candidate_pool=args.candidate_pool, pool_bytes=args.pool_bytes)
\ No newline at end of file
@@ -1,13 +1,16 @@
 import fitz  # PyMuPDF
 import re
 from collections import Counter, defaultdict
+from document_pool import get_document_pool
 
 
 def get_document_body_style(doc):
     """Analyzes the document to find the most common font size and name (body text)."""
     style_counts = Counter()
-    for page in doc:
-        for b in page.get_text("dict")["blocks"]:
+    # Span order does not matter for counting, so the pooled (sorted) page dicts are reused
+    pool = get_document_pool()
+    for page_num in range(doc.page_count):
+        for b in pool.page_dict(doc, page_num)["blocks"]:
             if "lines" in b:
                 for l in b["lines"]:
                     for s in l["spans"]:
@@ -87,8 +90,9 @@ def extract_outline_with_heuristics(doc):
     header_footer_zones = get_header_footer_zones(doc)
     potential_headings = []
     prefix_regex = re.compile(r'^\s*((?:[IVXLCDM]+\b)|(?:[A-Z]\b)|(?:\d+(?:\.\d+)))\s[.\)]', re.IGNORECASE)
+    pool = get_document_pool()
     for page_num, page in enumerate(doc, start=1):
-        blocks = page.get_text("dict", sort=True)["blocks"]
+        blocks = pool.page_dict(doc, page_num - 1)["blocks"]
         page_height = page.rect.height
         for block in blocks:
             block_rect = fitz.Rect(block['bbox'])
@@ -0,0 +1,183 @@
+import os
+import copy
+import json
+import math
+import time
+import tracemalloc
+import fitz  # PyMuPDF
+from document_pool import get_document_pool
+from main_1b import get_section_text
+from pdf_utils import extract_outline_with_heuristics
+from synthetic_corpus import add_font_arguments, generate_corpus, make_heading_styles
+
+# A log-log slope above this marks a stage as growing faster than linearly
+SUPER_LINEAR_SLOPE = 1.15
+
+
+def measure(stage_fn, track_memory=True):
+    """
+    Runs stage_fn on a cold document pool and returns (result, seconds, peak_python_bytes).
+    Memory is measured in a second run under tracemalloc so it does not skew the timing.
+    """
+    get_document_pool().clear()
+    start = time.perf_counter()
+    result = stage_fn()
+    elapsed = time.perf_counter() - start
+
+    peak = None
+    if track_memory:
+        get_document_pool().clear()
+        tracemalloc.start()
+        stage_fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def outline_recall(predicted, truth):
+    """Fraction of ground-truth headings found (same text and page) in the predicted outline."""
+    found = {(h['text'].strip(), h['page']) for h in predicted}
+    expected = [(h['text'], h['page']) for h in truth['outline']]
+    return sum(1 for h in expected if h in found) / max(len(expected), 1)
+
+
+def log_log_slope(sizes, values):
+    """Least-squares slope of log(value) against log(size); ~1 is linear, ~2 quadratic."""
+    points = [(math.log(s), math.log(v)) for s, v in zip(sizes, values) if s > 0 and v and v > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if var_x == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+def run_benchmark(corpus, analyst=None, query_text=None, track_memory=True):
+    """Times each pipeline stage on every generated document. Returns one row per (document, stage)."""
+    rows = []
+    if analyst is not None:
+        # Warm-up run so one-off model start-up cost is not charged to the smallest document
+        analyst.rank_sections(query_text, [{"document": "warm-up", "page_number": 1, "section_title": "Warm-up",
+                                            "content": "Warm-up section text."} for _ in range(8)])
+    for pdf_path, num_pages, truth in corpus:
+        print(f"\nBenchmarking {os.path.basename(pdf_path)} ({num_pages} pages)...")
+        doc = fitz.open(pdf_path)
+
+        outline, seconds, peak = measure(lambda: extract_outline_with_heuristics(doc), track_memory)
+        rows.append({"pages": num_pages, "stage": "extract_outline_with_heuristics", "seconds": seconds,
+                     "peak_bytes": peak, "items": len(outline), "recall": round(outline_recall(outline, truth), 4)})
+
+        # Slice sections along the ground-truth outline, so this stage's cost does not depend on heuristic recall
+        sections, seconds, peak = measure(lambda: get_section_text(doc, copy.deepcopy(truth['outline'])), track_memory)
+        rows.append({"pages": num_pages, "stage": "get_section_text", "seconds": seconds,
+                     "peak_bytes": peak, "items": len(sections)})
+
+        if analyst is not None and sections:
+            ranking_input = [{"document": os.path.basename(pdf_path), "page_number": s['page'],
+                              "section_title": s['text'], "content": s['content']} for s in sections]
+            ranked, seconds, peak = measure(
+                lambda: analyst.rank_sections(query_text, [dict(s) for s in ranking_input]), track_memory)
+            rows.append({"pages": num_pages, "stage": "rank_sections", "seconds": seconds,
+                         "peak_bytes": peak, "items": len(ranked)})
+        doc.close()
+    return rows
+
+
+def summarize(rows):
+    """Prints a per-stage table and the fitted growth exponent of time and memory."""
+    print(f"\n{'stage':<34} {'pages':>6} {'items':>6} {'time (s)':>10} {'peak MiB':>9} {'recall':>7}")
+    for row in rows:
+        peak = f"{row['peak_bytes'] / 2**20:.1f}" if row['peak_bytes'] is not None else "-"
+        recall = f"{row['recall']:.2f}" if 'recall' in row else ""
+        print(f"{row['stage']:<34} {row['pages']:>6} {row['items']:>6} {row['seconds']:>10.3f} {peak:>9} {recall:>7}")
+
+    print("\nGrowth exponents (log-log slope vs. page count):")
+    for stage in dict.fromkeys(row['stage'] for row in rows):
+        stage_rows = [r for r in rows if r['stage'] == stage]
+        sizes = [r['pages'] for r in stage_rows]
+        time_slope = log_log_slope(sizes, [r['seconds'] for r in stage_rows])
+        memory_slope = log_log_slope(sizes, [r['peak_bytes'] for r in stage_rows])
+        flag = "  <-- super-linear" if time_slope is not None and time_slope > SUPER_LINEAR_SLOPE else ""
+        time_text = f"{time_slope:.2f}" if time_slope is not None else "n/a"
+        memory_text = f"{memory_slope:.2f}" if memory_slope is not None else "n/a"
+        print(f" - {stage:<34} time: {time_text:>5}   memory: {memory_text:>5}{flag}")
+
+
+def plot(rows, output_path):
+    """Saves time and memory vs. page count plots, if matplotlib is installed."""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed; skipping plots.")
+        return
+
+    fig, (ax_time, ax_memory) = plt.subplots(1, 2, figsize=(12, 5))
+    for stage in dict.fromkeys(row['stage'] for row in rows):
+        stage_rows = [r for r in rows if r['stage'] == stage]
+        pages = [r['pages'] for r in stage_rows]
+        ax_time.plot(pages, [r['seconds'] for r in stage_rows], marker='o', label=stage)
+        if all(r['peak_bytes'] is not None for r in stage_rows):
+            ax_memory.plot(pages, [r['peak_bytes'] / 2**20 for r in stage_rows], marker='o', label=stage)
+    for ax, label in ((ax_time, "time (s)"), (ax_memory, "peak Python memory (MiB)")):
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xlabel("pages")
+        ax.set_ylabel(label)
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(output_path)
+    print(f"Saved plot to {output_path}")
+
+
+def main():
+    import argparse
+
+    SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+    PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+    parser = argparse.ArgumentParser(description="Scaling benchmark on synthetic PDFs")
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 50, 200, 1000], help='Document sizes to test')
+    parser.add_argument('--headings-per-page', type=float, default=2.0, help='Average headings per page')
+    parser.add_argument('--no-header-footer', action='store_true', help='Omit running headers and footers')
+    parser.add_argument('--no-toc', action='store_true', help='Do not embed bookmarks')
+    add_font_arguments(parser)
+    parser.add_argument('--corpus-dir', type=str, default=os.path.join(PROJECT_ROOT, 'output', 'synthetic'),
+                        help='Where the synthetic PDFs are written')
+    parser.add_argument('--skip-ranking', action='store_true', help='Do not benchmark rank_sections')
+    parser.add_argument('--skip-memory', action='store_true', help='Only measure time')
+    parser.add_argument('--results', type=str, default=None, help='Write the raw results to this JSON file')
+    parser.add_argument('--plot', type=str, default=None, help='Save time/memory plots to this image file')
+    args = parser.parse_args()
+
+    print("Generating synthetic corpus...")
+    corpus = generate_corpus(args.corpus_dir, args.pages, headings_per_page=args.headings_per_page,
+                             header_footer=not args.no_header_footer, with_toc=not args.no_toc,
+                             heading_styles=make_heading_styles(args.heading_sizes, args.heading_font),
+                             body_font=args.body_font, body_size=args.body_size)
+
+    analyst = None
+    model_path = os.path.join(PROJECT_ROOT, 'models', 'all-MiniLM-L6-v2')
+    if not args.skip_ranking:
+        if os.path.isdir(model_path):
+            from intelligence_core import DocumentAnalyst
+            analyst = DocumentAnalyst(model_path=model_path)
+        else:
+            print(f"Warning: model not found at {model_path}. Skipping rank_sections.")
+
+    rows = run_benchmark(corpus, analyst=analyst, query_text="As a travel planner, I need to plan a trip itinerary.",
+                         track_memory=not args.skip_memory)
+    summarize(rows)
+
+    if args.results:
+        with open(args.results, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=4)
+    if args.plot:
+        plot(rows, args.plot)
+
+
+if __name__ == "__main__":
+    main()
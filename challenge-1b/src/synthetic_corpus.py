@@ -0,0 +1,201 @@
+import os
+import json
+import random
+import fitz  # PyMuPDF
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN_X = 56
+CONTENT_TOP, CONTENT_BOTTOM = 70, 780
+HEADER_Y, FOOTER_Y = 36, 812
+
+TITLE_SIZE = 26
+BODY_SIZE = 10
+# Line spacing as a multiple of the body font size
+BODY_LEADING_FACTOR = 1.4
+# Vertical space taken by a heading as a multiple of its font size (1.0 above the baseline, 0.8 below)
+HEADING_SPACING = 1.8
+# Default heading level -> (font size, font name); PyMuPDF base-14 names, 'hebo' is Helvetica-Bold
+HEADING_STYLES = {1: (20, "hebo"), 2: (16, "hebo"), 3: (13, "hebo")}
+BODY_FONT = "helv"
+WORDS_PER_BODY_LINE = 14
+
+VOCABULARY = (
+    "analysis budget coastal culinary data design district evening festival guide harbour history "
+    "itinerary journey local market method museum network overview planning region report research "
+    "result river route schedule season service strategy summary system tour travel valley village "
+    "vineyard walking weather workshop"
+).split()
+
+
+def _sentence(rng, num_words):
+    words = [rng.choice(VOCABULARY) for _ in range(num_words)]
+    return " ".join(words).capitalize() + "."
+
+
+def _content_top(page_index):
+    """Baseline the first heading or body line of a page starts from; page 1 also holds the title."""
+    return CONTENT_TOP + (TITLE_SIZE * 2 if page_index == 0 else 0)
+
+
+def _check_headings_fit(headings_by_page, heading_styles, body_leading):
+    """Raises ValueError if a page cannot hold its headings with at least one body line each."""
+    for page_index, levels in enumerate(headings_by_page):
+        needed = sum(heading_styles[level][0] * HEADING_SPACING + body_leading for level in levels)
+        if needed > CONTENT_BOTTOM - _content_top(page_index):
+            largest = max(size for size, _ in heading_styles.values()) * HEADING_SPACING + body_leading
+            fits = int((CONTENT_BOTTOM - _content_top(0)) // largest)
+            raise ValueError(f"Page {page_index + 1} cannot fit its {len(levels)} headings. With these font "
+                             f"sizes only {fits} headings per page are guaranteed to fit; use fewer headings.")
+
+
+def _heading_levels(rng, num_headings, max_depth):
+    """Returns a plausible heading level sequence: starts at 1, never skips a level going down."""
+    levels = []
+    current = 0
+    for _ in range(num_headings):
+        current = rng.randint(1, min(current + 1, max_depth)) if current else 1
+        levels.append(current)
+    return levels
+
+
+def make_heading_styles(sizes, font="hebo"):
+    """Builds a heading_styles dict from a list of sizes, H1 first, all set in one font."""
+    return {level: (size, font) for level, size in enumerate(sizes, start=1)}
+
+
+def generate_pdf(output_path, num_pages=10, num_headings=None, max_depth=3, header_footer=True,
+                 with_toc=True, seed=0, heading_styles=None, body_font=BODY_FONT, body_size=BODY_SIZE):
+    """
+    Writes a synthetic PDF with a known outline and returns its ground truth.
+
+    Args:
+        output_path: Where to save the PDF.
+        num_pages: Number of pages.
+        num_headings: Total headings, spread evenly over the pages (default: 2 per page).
+            Raises ValueError if a page cannot fit its share with these font sizes.
+        max_depth: Deepest heading level used (1-3).
+        header_footer: Add a running header and a page-number footer to every page.
+        with_toc: Embed the outline as PDF bookmarks.
+        seed: Random seed, so the same arguments always give the same document.
+        heading_styles: Heading level -> (font size, font name). Defaults to HEADING_STYLES.
+            Headings set in the body font and size make the heuristics' job hardest.
+        body_font: Font name of the body text, headers and footers.
+        body_size: Font size of the body text.
+
+    Returns:
+        A dict in the Challenge 1A output format ({"title", "outline"}), where
+        each outline entry has 'level', 'text' and 'page' (1-based).
+    """
+    rng = random.Random(seed)
+    num_headings = num_headings if num_headings is not None else 2 * num_pages
+    heading_styles = heading_styles or HEADING_STYLES
+    max_depth = max(1, min(max_depth, len(heading_styles)))
+    body_leading = body_size * BODY_LEADING_FACTOR
+    title = f"Synthetic Report {num_pages} Pages"
+
+    levels = _heading_levels(rng, num_headings, max_depth)
+    headings_by_page = [[] for _ in range(num_pages)]
+    for i, level in enumerate(levels):
+        headings_by_page[i * num_pages // max(num_headings, 1)].append(level)
+    _check_headings_fit(headings_by_page, heading_styles, body_leading)
+
+    doc = fitz.open()
+    outline = []
+    counters = [0] * (max_depth + 1)
+    for page_index in range(num_pages):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        # All text of a page goes through one Shape and is committed once; a separate
+        # page.insert_text call per line makes generation several times slower
+        shape = page.new_shape()
+        if header_footer:
+            shape.insert_text((MARGIN_X, HEADER_Y), f"{title} | Confidential draft", fontsize=8, fontname=body_font)
+            shape.insert_text((PAGE_WIDTH / 2, FOOTER_Y), f"Page {page_index + 1}", fontsize=8, fontname=body_font)
+
+        if page_index == 0:
+            shape.insert_text((MARGIN_X, CONTENT_TOP + TITLE_SIZE), title, fontsize=TITLE_SIZE, fontname="hebo")
+        y = _content_top(page_index)
+
+        page_headings = headings_by_page[page_index]
+        # Share the space left after the headings between their bodies (or fill the page with body text);
+        # _check_headings_fit guarantees at least one line each, so nothing goes past CONTENT_BOTTOM
+        heading_height = sum(heading_styles[level][0] * HEADING_SPACING for level in page_headings)
+        body_lines = max(int((CONTENT_BOTTOM - y - heading_height) / body_leading) // max(len(page_headings), 1), 1)
+        for level in page_headings or [None]:
+            if level is not None:
+                counters[level] += 1
+                counters[level + 1:] = [0] * (len(counters) - level - 1)
+                number = ".".join(str(c) for c in counters[1:level + 1])
+                text = f"{number} {' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(2, 4))).title()}"
+                size, font = heading_styles[level]
+                y += size
+                shape.insert_text((MARGIN_X, y), text, fontsize=size, fontname=font)
+                y += size * 0.8
+                outline.append({"level": f"H{level}", "text": text, "page": page_index + 1})
+            lines = [_sentence(rng, WORDS_PER_BODY_LINE) for _ in range(body_lines)]
+            shape.insert_text((MARGIN_X, y + body_leading), lines, fontsize=body_size, fontname=body_font,
+                              lineheight=BODY_LEADING_FACTOR)
+            y += body_leading * body_lines
+        shape.commit()
+
+    if with_toc and outline:
+        doc.set_toc([[int(h['level'][1:]), h['text'], h['page']] for h in outline])
+    doc.set_metadata({"title": title, "producer": "synthetic_corpus.py"})
+    doc.save(output_path, garbage=3, deflate=True)
+    doc.close()
+    return {"title": title, "outline": outline}
+
+
+def generate_corpus(output_dir, page_counts, headings_per_page=2.0, max_depth=3, header_footer=True,
+                    with_toc=True, seed=0, heading_styles=None, body_font=BODY_FONT, body_size=BODY_SIZE):
+    """
+    Generates one PDF per page count, each with a '<name>.json' ground-truth file next to it.
+    Font arguments are passed on to generate_pdf.
+    Returns a list of (pdf_path, num_pages, ground_truth) tuples.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    generated = []
+    for num_pages in page_counts:
+        name = f"synthetic_{num_pages:05d}p_{'toc' if with_toc else 'notoc'}"
+        pdf_path = os.path.join(output_dir, name + ".pdf")
+        truth = generate_pdf(pdf_path, num_pages=num_pages,
+                             num_headings=max(1, int(num_pages * headings_per_page)),
+                             max_depth=max_depth, header_footer=header_footer,
+                             with_toc=with_toc, seed=seed + num_pages, heading_styles=heading_styles,
+                             body_font=body_font, body_size=body_size)
+        with open(os.path.join(output_dir, name + ".json"), 'w', encoding='utf-8') as f:
+            json.dump(truth, f, indent=4, ensure_ascii=False)
+        generated.append((pdf_path, num_pages, truth))
+    return generated
+
+
+def add_font_arguments(parser):
+    """Adds the --heading-sizes/--heading-font/--body-font/--body-size options shared with the benchmark."""
+    parser.add_argument('--heading-sizes', type=float, nargs='+',
+                        default=[HEADING_STYLES[level][0] for level in sorted(HEADING_STYLES)],
+                        help='Font size of each heading level, H1 first')
+    parser.add_argument('--heading-font', type=str, default=HEADING_STYLES[1][1],
+                        help='Heading font (PyMuPDF base-14 name)')
+    parser.add_argument('--body-font', type=str, default=BODY_FONT, help='Body font (PyMuPDF base-14 name)')
+    parser.add_argument('--body-size', type=float, default=BODY_SIZE, help='Body font size')
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Synthetic PDF corpus generator with ground-truth outlines")
+    parser.add_argument('--output-dir', type=str, default='synthetic', help='Directory for the PDFs and JSON files')
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 100, 1000], help='Page count of each PDF')
+    parser.add_argument('--headings-per-page', type=float, default=2.0, help='Average headings per page')
+    parser.add_argument('--max-depth', type=int, default=3, help='Deepest heading level (<= number of heading sizes)')
+    parser.add_argument('--no-header-footer', action='store_true', help='Omit running headers and footers')
+    parser.add_argument('--no-toc', action='store_true', help='Do not embed bookmarks')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    add_font_arguments(parser)
+    args = parser.parse_args()
+
+    for pdf_path, num_pages, truth in generate_corpus(
+            args.output_dir, args.pages, headings_per_page=args.headings_per_page, max_depth=args.max_depth,
+            header_footer=not args.no_header_footer, with_toc=not args.no_toc, seed=args.seed,
+            heading_styles=make_heading_styles(args.heading_sizes, args.heading_font),
+            body_font=args.body_font, body_size=args.body_size):
+        print(f"✅ {pdf_path}: {num_pages} pages, {len(truth['outline'])} headings")